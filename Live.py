@@ -28,6 +28,7 @@ Specifiche richieste:
       MotoGP: MotoGP.png
       Tennis: Tennis.png (se presente, non validiamo l'esistenza in rete).
   - Un logo mancante non blocca l'evento (logo = null).
+    Con VALIDATE_LOGOS=1 (richiede aiohttp) i loghi vengono verificati via HEAD e quelli 404 azzerati.
   - Campi output per ogni evento:
         id, name, streams[{url,title}], logo, category (seriea|serieb|seriec|coppe|tennis|f1|motogp),
         description (Categoria + orario Europe/Rome), eventStart (UTC ISO con Z).
@@ -39,7 +40,8 @@ Altrimenti assumiamo l'orario come UTC.
 
 from __future__ import annotations
 
-import os, re, json, datetime, requests
+import os, re, json, string, asyncio, datetime, functools, requests
+from collections import Counter
 from typing import Any, Dict, List
 
 try:
@@ -51,11 +53,37 @@ except Exception:  # fallback senza pytz
     pytz = None
     TZ_LONDON = TZ_ROME = UTC = None
 
+try:
+    import orjson  # opzionale: (de)serializzazione JSON in C, molto più veloce
+    _loads = orjson.loads
+    def _dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+except Exception:  # fallback json standard
+    orjson = None
+    _loads = json.loads
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
+
+try:
+    import aiohttp  # opzionale: solo per VALIDATE_LOGOS
+except Exception:
+    aiohttp = None
+
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 REMOTE_SCHEDULE_URL = 'https://raw.githubusercontent.com/ciccioxm3/STRTV/main/daddyliveSchedule.json'
 OUTPUT_FILE = os.path.join(BASE_DIR, 'config', 'dynamic_channels.json')
+# LIVE_DEBUG=1: conta e stampa le categorie viste nello schedule
+_DEBUG = bool(os.environ.get('LIVE_DEBUG'))
+# Copia locale dello schedule + ETag: permette richieste condizionali (304 Not Modified)
+SCHEDULE_CACHE_FILE = os.path.join(BASE_DIR, 'config', '.schedule_cache.json')
+SCHEDULE_ETAG_FILE = os.path.join(BASE_DIR, 'config', '.schedule_etag')
+
+_SESSION = requests.Session()  # keep-alive / connection pooling tra esecuzioni ripetute
 
 LOGO_BASE = 'https://raw.githubusercontent.com/qwertyuiop8899/logo/main'
+# Verifica esistenza loghi (HEAD concorrenti); disattivata di default
+VALIDATE_LOGOS = os.environ.get('VALIDATE_LOGOS', '').strip().lower() in ('1', 'true', 'yes')
+LOGO_CHECK_CONCURRENCY = 32
 
 EXCLUDE_KEYWORDS_CHANNEL = ["college", "youth"]
 
@@ -113,19 +141,72 @@ TEAM_SPECIAL = {
 
 MATCH_SPLIT_REGEX = re.compile(r'\bvs\b| - ', re.IGNORECASE)
 
+# Regex precompilate usate nel loop eventi (evita ricompilazione/lookup cache per ogni evento)
+_RX_ATP_WTA = re.compile(r'\b(ATP|WTA)\b', re.IGNORECASE)
+_RX_MOTOGP = re.compile(r'\bmotogp\b', re.IGNORECASE)
+_RX_F1 = re.compile(r'\b(f1|formula 1)\b', re.IGNORECASE)
+_RX_SALERNITANA = re.compile(r'salernitana', re.IGNORECASE)
+_RX_TIMEPREFIX = re.compile(r'^\d{1,2}:\d{2}:')
+_RX_ORDINAL = re.compile(r'(\d+)(?:st|nd|rd|th)\b', re.IGNORECASE)
+_RX_HTML = re.compile(r'<[^>]+>')
+_RX_SLUG = re.compile(r'[^a-z0-9]+')
+# Slug ASCII senza regex: ogni carattere non [a-z0-9] diventa '-'
+_SLUG_TABLE = str.maketrans({c: '-' for c in range(128) if chr(c) not in string.ascii_lowercase + string.digits})
+_RX_EXCLUDE_CH = re.compile('|'.join(map(re.escape, EXCLUDE_KEYWORDS_CHANNEL)), re.IGNORECASE)
+_RX_NHL_TEAMS = re.compile(r"\b(bruins|sabres|red wings|panthers|canadiens|senators|lightning|maple leafs|hurricanes|blue jackets|devils|islanders|rangers|flyers|penguins|capitals|blackhawks|avalanche|stars|wild|predators|blues|coyotes|flames|oilers|kings|sharks|kraken|canucks|golden knights|jets|nhl)\b", re.IGNORECASE)
+_RX_NBA = re.compile(r'\bNBA\b', re.IGNORECASE)
+_RX_LBA = re.compile(r'\bLBA\b', re.IGNORECASE)
+_RX_FIBA = re.compile(r'\bFIBA\b', re.IGNORECASE)
+_RX_EUROBASKET = re.compile(r'\bEurobasket\b', re.IGNORECASE)
+_RX_EUROLEAGUE = re.compile(r'Euroleague|Eurolega', re.IGNORECASE)
+_RX_EUROLEAGUE_PREFIX = re.compile(r'(Euroleague|Eurolega)\b', re.IGNORECASE)  # usata con .match sul titolo
+_RX_COPPA_ITALIA = re.compile(r'Coppa Italia', re.IGNORECASE)
+_RX_VOLLEY_ITA = re.compile(r'Italy|Serie A|Modena|Trento|Perugia|Civitanova|Piacenza|Milano|Verona|Monza|Taranto', re.IGNORECASE)
+_RX_MMA_UFC = re.compile(r'\b(MMA|UFC)\b', re.IGNORECASE)
+_RX_NFL = re.compile(r'\bNFL\b', re.IGNORECASE)
+_RX_MLB = re.compile(r'\b(MLB|Major League Baseball)\b', re.IGNORECASE)
+
+MOTOR_CATEGORIES = ('motor sports', 'motorsports', 'Motorsport')
+
 def load_schedule() -> Dict[str, Any]:
-    """Scarica SEMPRE il file schedule remoto; nessuna copia locale."""
-    resp = requests.get(REMOTE_SCHEDULE_URL, timeout=25)
+    """Scarica il file schedule remoto con richiesta condizionale (If-None-Match).
+
+    Se il server risponde 304 usa la copia locale salvata al download precedente.
+    """
+    headers = {}
+    if os.path.exists(SCHEDULE_CACHE_FILE):
+        try:
+            with open(SCHEDULE_ETAG_FILE, 'r', encoding='utf-8') as f:
+                etag = f.read().strip()
+            if etag:
+                headers['If-None-Match'] = etag
+        except OSError:
+            pass
+    resp = _SESSION.get(REMOTE_SCHEDULE_URL, headers=headers, timeout=25)
+    if resp.status_code == 304:
+        with open(SCHEDULE_CACHE_FILE, 'rb') as f:
+            return _loads(f.read())
     resp.raise_for_status()
-    return resp.json()
+    data = _loads(resp.content)
+    etag = resp.headers.get('ETag')
+    if etag:
+        try:
+            os.makedirs(os.path.dirname(SCHEDULE_CACHE_FILE), exist_ok=True)
+            with open(SCHEDULE_CACHE_FILE, 'wb') as f:
+                f.write(resp.content)
+            with open(SCHEDULE_ETAG_FILE, 'w', encoding='utf-8') as f:
+                f.write(etag)
+        except OSError as e:
+            print(f"Impossibile salvare cache schedule: {e}")
+    return data
 
 def clean_day_string(day: str) -> str:
-    day = day.replace(' - Schedule Time UK GMT', '')
-    for suf in ('st','nd','rd','th'):
-        day = re.sub(rf'(\d+){suf}', r'\1', day)
-    return day.strip()
+    # Rimuove i suffissi ordinali (1st, 2nd, 3rd, 4th...) in un solo passaggio
+    return _RX_ORDINAL.sub(r'\1', day.replace(' - Schedule Time UK GMT', '')).strip()
 
-def parse_event_datetime(day_str: str, time_uk: str) -> datetime.datetime:
+@functools.lru_cache(maxsize=512)
+def _parse_day(day_str: str) -> tuple[int, int, int]:
+    """Estrae (anno, mese, giorno) dalla chiave giorno dello schedule (fallback: data odierna UTC)."""
     day_clean = clean_day_string(day_str)
     parts = day_clean.split()
     month = daynum = year = None
@@ -146,22 +227,67 @@ def parse_event_datetime(day_str: str, time_uk: str) -> datetime.datetime:
     month = month or now.month
     daynum = daynum or now.day
     year = year or now.year
+    return year, month, daynum
+
+def _parse_hm(time_uk: str) -> tuple[int, int]:
+    """Orario 'HH:MM' -> (ore, minuti); (0, 0) se non interpretabile."""
     try:
-        hour, minute = map(int, time_uk.split(':'))
+        h, _, m = time_uk.partition(':')
+        return int(h), int(m)
     except Exception:
-        hour, minute = 0, 0
+        return 0, 0
+
+# Stesso (giorno, orario) ricorre per molti eventi: i datetime sono immutabili, quindi condivisibili
+@functools.lru_cache(maxsize=4096)
+def _combine(ymd: tuple[int, int, int], time_uk: str) -> datetime.datetime:
+    year, month, daynum = ymd
+    hour, minute = _parse_hm(time_uk)
     naive = datetime.datetime(year, month, daynum, hour, minute)
     if pytz and TZ_LONDON:
         aware = TZ_LONDON.localize(naive)
         return aware.astimezone(pytz.UTC)
     return naive.replace(tzinfo=datetime.timezone.utc)
 
+@functools.lru_cache(maxsize=512)
+def _rome_offset(ymd: tuple[int, int, int]) -> datetime.timedelta | None:
+    """Offset UTC -> Europe/Rome costante per tutto il giorno, None se il giorno contiene un cambio ora."""
+    if not (pytz and TZ_ROME):
+        return None
+    try:
+        first = _combine(ymd, '00:00').astimezone(TZ_ROME).utcoffset()
+        last = _combine(ymd, '23:59').astimezone(TZ_ROME).utcoffset()
+    except ValueError:
+        return None  # data impossibile (es. 31 febbraio): decidono i singoli eventi, come prima
+    return first if first == last else None
+
+# Eventi nello stesso slot condividono le stringhe di orario: formattate una sola volta per slot
+@functools.lru_cache(maxsize=4096)
+def _format_start(start_dt_utc: datetime.datetime, rome_offset: datetime.timedelta | None = None) -> tuple[str, str]:
+    """Ritorna (eventStart UTC ISO con Z, data/ora Europe/Rome per la descrizione)."""
+    if rome_offset is not None:
+        # Offset del giorno già noto: somma diretta invece della ricerca nelle transizioni pytz
+        rome_str = (start_dt_utc.replace(tzinfo=None) + rome_offset).strftime('%d/%m %H:%M')
+    elif pytz and TZ_ROME:
+        rome_dt = start_dt_utc.astimezone(TZ_ROME)
+        # Mostra data + ora locale Roma
+        rome_str = rome_dt.strftime('%d/%m %H:%M')
+    else:
+        # Nessuna timezone: mostra solo data senza orario e senza etichetta UTC
+        rome_str = start_dt_utc.strftime('%d/%m')
+    return start_dt_utc.replace(microsecond=0).isoformat().replace('+00:00','Z'), rome_str
+
+@functools.lru_cache(maxsize=1024)
 def strip_prefixes(team: str) -> str:
     team = TEAM_PREFIXES_REGEX.sub('', team.strip())
-    words = [w for w in re.split(r'\s+', team) if w.lower() not in TEAM_CLEAN_WORDS]
+    words = [w for w in team.split() if w.lower() not in TEAM_CLEAN_WORDS]
     return ' '.join(words).strip()
 
+# Le squadre si ripetono per tutta la stagione: cache + uscita anticipata sui nomi già noti
+@functools.lru_cache(maxsize=1024)
 def normalize_team(team: str) -> str:
+    key = team.strip().lower()
+    if key in TEAM_SPECIAL:
+        return TEAM_SPECIAL[key]
     base = strip_prefixes(team)
     key = base.lower()
     if key in TEAM_SPECIAL:
@@ -174,13 +300,22 @@ def extract_teams(event_name: str) -> tuple[str|None, str|None]:
         return parts[0].strip(), parts[1].strip()
     return None, None
 
-def build_logo(category_src: str, raw_event: str) -> str | None:
+def detect_motor_series(raw_event: str) -> str | None:
+    """Ritorna 'motogp' / 'f1' se l'evento motori appartiene a una serie supportata."""
+    if _RX_MOTOGP.search(raw_event):
+        return 'motogp'
+    if _RX_F1.search(raw_event):
+        return 'f1'
+    return None
+
+def build_logo(category_src: str, raw_event: str, motor: str | None = None) -> str | None:
     if category_src in COPPA_LOGOS:
         return f"{LOGO_BASE}/{COPPA_LOGOS[category_src]}"
-    if category_src in ('motor sports', 'motorsports', 'Motorsport'):
-        if re.search(r'\bmotogp\b', raw_event, re.IGNORECASE):
+    if category_src in MOTOR_CATEGORIES:
+        motor = motor or detect_motor_series(raw_event)
+        if motor == 'motogp':
             return f"{LOGO_BASE}/MotoGP.png"
-        if re.search(r'\b(f1|formula 1)\b', raw_event, re.IGNORECASE):
+        if motor == 'f1':
             return f"{LOGO_BASE}/F1.png"
         return None
     if category_src == 'Tennis':
@@ -200,12 +335,12 @@ def build_logo(category_src: str, raw_event: str) -> str | None:
     if category_src == 'Italy - Serie C':
         # Usa Salernitana.png solo se una delle squadre è Salernitana, altrimenti logo generico SerieC.png
         t1, t2 = extract_teams(raw_event)
-        if any(t and re.search(r'salernitana', t, re.IGNORECASE) for t in (t1, t2)):
+        if any(t and _RX_SALERNITANA.search(t) for t in (t1, t2)):
             return f"{LOGO_BASE}/Salernitana.png"
         return f"{LOGO_BASE}/SerieC.png"
     return None
 
-def map_category(category_src: str, raw_event: str) -> str | None:
+def map_category(category_src: str, raw_event: str, motor: str | None = None) -> str | None:
     if category_src == 'Italy - Serie A': return 'seriea'
     if category_src == 'Italy - Serie B': return 'serieb'
     if category_src == 'Italy - Serie C': return 'seriec'
@@ -214,45 +349,40 @@ def map_category(category_src: str, raw_event: str) -> str | None:
     # Normalizzazione categorie motori ("motor sports", "motorsports", "Motorsport")
     norm_motor = category_src.lower().replace(' ', '')
     if norm_motor in ('motorsports', 'motorsport'):
-        if re.search(r'\bmotogp\b', raw_event, re.IGNORECASE):
-            return 'motogp'
-        if re.search(r'\b(f1|formula 1)\b', raw_event, re.IGNORECASE):
-            return 'f1'
-        return None
+        return motor or detect_motor_series(raw_event)
     if category_src == 'Basketball':
         # Solo NBA, LBA (Italiano), Euroleague / Eurolega / Coppa Italia Basket
-        if re.search(r'\bNBA\b', raw_event, re.IGNORECASE): return 'basket'
-        if re.search(r'\bLBA\b', raw_event, re.IGNORECASE): return 'basket'
-        if re.search(r'\bFIBA\b', raw_event, re.IGNORECASE): return 'basket'
-        if re.search(r'\bEurobasket\b', raw_event, re.IGNORECASE): return 'basket'
-        if re.search(r'Euroleague|Eurolega', raw_event, re.IGNORECASE): return 'basket'
-        if re.search(r'Coppa Italia', raw_event, re.IGNORECASE): return 'basket'
+        if _RX_NBA.search(raw_event): return 'basket'
+        if _RX_LBA.search(raw_event): return 'basket'
+        if _RX_FIBA.search(raw_event): return 'basket'
+        if _RX_EUROBASKET.search(raw_event): return 'basket'
+        if _RX_EUROLEAGUE.search(raw_event): return 'basket'
+        if _RX_COPPA_ITALIA.search(raw_event): return 'basket'
         return None
     if category_src == 'Volleyball':
         # Solo campionato italiano: rilievo su nomi squadre italiane comuni / "Italy" / "Serie A"
-        if re.search(r'Italy|Serie A|Modena|Trento|Perugia|Civitanova|Piacenza|Milano|Verona|Monza|Taranto', raw_event, re.IGNORECASE):
+        if _RX_VOLLEY_ITA.search(raw_event):
             return 'volleyball'
         return None
     if category_src == 'Ice Hockey':
         # Includi solo eventi NHL: match "NHL" oppure nomi squadre note
-        NHL_TEAMS_REGEX = re.compile(r"\b(bruins|sabres|red wings|panthers|canadiens|senators|lightning|maple leafs|hurricanes|blue jackets|devils|islanders|rangers|flyers|penguins|capitals|blackhawks|avalanche|stars|wild|predators|blues|coyotes|flames|oilers|kings|sharks|kraken|canucks|golden knights|jets|nhl)\b", re.IGNORECASE)
-        if NHL_TEAMS_REGEX.search(raw_event):
+        if _RX_NHL_TEAMS.search(raw_event):
             return 'icehockey'
         return None
     if category_src in ('Wrestling', 'WWE'):
         return 'wrestling'
     # Boxing + MMA aggregati nella stessa categoria "boxing"; includi anche eventi che nel titolo hanno MMA o UFC
-    if category_src in ('Boxing', 'MMA', 'UFC') or re.search(r'\b(MMA|UFC)\b', raw_event, re.IGNORECASE):
+    if category_src in ('Boxing', 'MMA', 'UFC') or _RX_MMA_UFC.search(raw_event):
         return 'boxing'
     if category_src == 'Darts':
         return 'darts'
     if category_src == 'Football':
         # Solo eventi NFL (slug coerente con addon: 'nfl')
-        if re.search(r'\bNFL\b', raw_event, re.IGNORECASE): return 'nfl'
+        if _RX_NFL.search(raw_event): return 'nfl'
         return None
     if category_src == 'Baseball':
         # Solo eventi MLB (pattern copre "MLB" o "Major League Baseball" in qualunque case)
-        if re.search(r'\b(MLB|Major League Baseball)\b', raw_event, re.IGNORECASE):
+        if _RX_MLB.search(raw_event):
             return 'baseball'
         return None
     return None
@@ -262,41 +392,215 @@ def should_include_category(cat: str) -> bool:
 
 # Rileva competizioni whitelisted all'interno di un evento della categoria generica "Soccer"
 SOCCER_CONTAINER_NAMES = { 'soccer' }
-INLINE_COMPETITION_PATTERNS = [
-    (re.compile(r'\bChampions League\b', re.IGNORECASE), 'UEFA Champions League'),
-    (re.compile(r'\bEuropa League\b', re.IGNORECASE), 'UEFA Europa League'),
-    (re.compile(r'\bConference League\b', re.IGNORECASE), 'Conference League'),
-    (re.compile(r'\bCoppa Italia\b', re.IGNORECASE), 'Coppa Italia'),
-    (re.compile(r'Italy\s*-\s*Serie A', re.IGNORECASE), 'Italy - Serie A'),
-    (re.compile(r'Italy\s*-\s*Serie B', re.IGNORECASE), 'Italy - Serie B'),
-    (re.compile(r'Italy\s*-\s*Serie C', re.IGNORECASE), 'Italy - Serie C'),
-]
+# Unica alternanza con gruppi nominati: una sola scansione per evento invece di 7 regex separate
+_RX_INLINE = re.compile(
+    r'(?P<ucl>\bChampions League\b)'
+    r'|(?P<uel>\bEuropa League\b)'
+    r'|(?P<confl>\bConference League\b)'
+    r'|(?P<coppa>\bCoppa Italia\b)'
+    r'|(?P<sa>Italy\s*-\s*Serie A)'
+    r'|(?P<sb>Italy\s*-\s*Serie B)'
+    r'|(?P<sc>Italy\s*-\s*Serie C)',
+    re.IGNORECASE)
+_GROUP_TO_LABEL = {
+    'ucl': 'UEFA Champions League',
+    'uel': 'UEFA Europa League',
+    'confl': 'Conference League',
+    'coppa': 'Coppa Italia',
+    'sa': 'Italy - Serie A',
+    'sb': 'Italy - Serie B',
+    'sc': 'Italy - Serie C',
+}
 
 def detect_inline_competition(event_name: str) -> str | None:
-    for rx, label in INLINE_COMPETITION_PATTERNS:
-        if rx.search(event_name):
-            return label
-    return None
+    m = _RX_INLINE.search(event_name)
+    return _GROUP_TO_LABEL[m.lastgroup] if m else None
 
 def should_include_channel_text(text: str) -> bool:
-    tl = text.lower()
-    return not any(k in tl for k in EXCLUDE_KEYWORDS_CHANNEL)
+    return _RX_EXCLUDE_CH.search(text) is None
 
 def extract_event_title(raw_event: str) -> str:
     # se formato "20:00: Juventus vs Inter" -> rimuovi prefisso orario
-    if re.match(r'^\d{1,2}:\d{2}:', raw_event):
+    if _RX_TIMEPREFIX.match(raw_event):
         return raw_event.split(':', 1)[1].strip()
     return raw_event.strip()
 
 def build_event_id(name: str, start_dt: datetime.datetime) -> str:
-    slug = re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-')[:60]
+    low = name.lower()
+    if low.isascii():
+        # join delle parti non vuote = compressione dei '-' consecutivi + strip
+        slug = '-'.join(filter(None, low.translate(_SLUG_TABLE).split('-')))[:60]
+    else:
+        slug = _RX_SLUG.sub('-', low).strip('-')[:60]
     return f"{slug}-{start_dt.strftime('%Y%m%d')}"
 
+async def _find_missing_logos(urls: set[str]) -> set[str]:
+    sem = asyncio.Semaphore(LOGO_CHECK_CONCURRENCY)
+    missing: set[str] = set()
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=15)) as session:
+        async def check(url: str) -> None:
+            async with sem:
+                try:
+                    async with session.head(url, allow_redirects=False) as resp:
+                        if resp.status == 404:
+                            missing.add(url)
+                except Exception:
+                    pass  # errore di rete: il logo resta (non blocca l'evento)
+        await asyncio.gather(*(check(u) for u in urls))
+    return missing
+
+def validate_logos(entries: List[Dict[str, Any]]) -> int:
+    """Imposta logo = None sugli eventi il cui logo risponde 404. Ritorna il numero di eventi modificati."""
+    if aiohttp is None:
+        print("VALIDATE_LOGOS attivo ma aiohttp non installato: validazione loghi saltata")
+        return 0
+    # Ogni URL viene verificato una sola volta anche se condiviso da più eventi
+    urls = {e['logo'] for e in entries if e.get('logo')}
+    if not urls:
+        return 0
+    missing = asyncio.run(_find_missing_logos(urls))
+    cleared = 0
+    for e in entries:
+        if e.get('logo') in missing:
+            e['logo'] = None
+            cleared += 1
+    return cleared
+
+def merge_streams(entry: Dict[str, Any], streams: List[Dict[str, str]]) -> None:
+    """Aggiunge a entry gli stream non ancora presenti (confronto per url)."""
+    known = {s['url'] for s in entry['streams']}
+    for s in streams:
+        if s['url'] not in known:
+            known.add(s['url'])
+            entry['streams'].append(s)
+
+def write_json_array(f, items: List[Dict[str, Any]]) -> None:
+    """Scrive la lista come array JSON (indent 2) un elemento alla volta, senza serializzarla tutta in memoria."""
+    if not items:
+        f.write(b'[]')
+        return
+    f.write(b'[\n')
+    for i, item in enumerate(items):
+        if i:
+            f.write(b',\n')
+        # Le stringhe JSON non contengono newline letterali: re-indentare le righe è sicuro
+        f.write(b'  ' + _dumps(item).replace(b'\n', b'\n  '))
+    f.write(b'\n]')
+
 def get_stream_url(channel_obj: Any) -> str | None:
     if isinstance(channel_obj, dict) and channel_obj.get('channel_id'):
         return f"https://thedaddy.click/stream/stream-{channel_obj['channel_id']}.php"
     return None
 
+def clean_category_key(raw: str) -> str:
+    # Caso comune: nessun tag HTML, evita la regex
+    if '<' not in raw:
+        return raw.strip()
+    # Rimuove frammenti HTML come </span> e eventuali tag residui
+    c = raw.replace('</span>', '')
+    c = _RX_HTML.sub('', c)
+    return c.strip()
+
+def process_day(day: str, day_data: Any, seen: Dict[tuple[str, str], Dict[str, Any]]) -> tuple[List[Dict[str, Any]], int, Dict[str, int]]:
+    """Elabora tutti gli eventi di un giorno dello schedule.
+
+    seen: (id, eventStart) -> evento già incluso, condiviso tra i giorni (l'id da solo non contiene l'orario).
+    Ritorna (eventi inclusi, eventi analizzati, conteggio eventi grezzi per categoria).
+    """
+    entries: List[Dict[str, Any]] = []
+    total_events = 0
+    debug_categories: Dict[str, int] = Counter()
+    if not isinstance(day_data, dict):
+        return entries, total_events, debug_categories
+    # Metodi pre-legati: evita il lookup dell'attributo a ogni iterazione
+    _search_atp = _RX_ATP_WTA.search
+    append_entry = entries.append
+    # Data del giorno invariata per tutti gli eventi: parse una sola volta
+    day_ymd = _parse_day(day)
+    day_rome_offset = _rome_offset(day_ymd)
+    for category_src_raw, events in day_data.items():
+        category_src = clean_category_key(category_src_raw)
+        if _DEBUG:
+            debug_categories[category_src] += len(events) if isinstance(events, list) else 0
+        if not isinstance(events, list):
+            continue
+        is_soccer_container = category_src.lower() in SOCCER_CONTAINER_NAMES
+        category_whitelisted = should_include_category(category_src)
+        for game in events:
+            total_events += 1
+            raw_event = (game.get('event') or '').strip()
+            if not raw_event:
+                continue
+            # Filtri ordinati dal più economico: senza alcun channel_id l'evento non avrà stream
+            channels = game.get('channels') or []
+            if not any(isinstance(c, dict) and c.get('channel_id') for c in channels):
+                continue
+            effective_category_src = category_src
+            if is_soccer_container:
+                detected = detect_inline_competition(raw_event)
+                if not detected:
+                    continue  # evento soccer non whitelisted
+                effective_category_src = detected
+            else:
+                if not category_whitelisted:
+                    continue  # categoria non whitelisted
+            # Filtro specifico richiesto: nella categoria Tennis includi SOLO eventi con ATP o WTA nel nome
+            if effective_category_src == 'Tennis' and not _search_atp(raw_event):
+                continue
+            # Serie motori calcolata una sola volta e condivisa da map_category / build_logo
+            motor = detect_motor_series(raw_event) if effective_category_src in MOTOR_CATEGORIES else None
+            mapped_cat = map_category(effective_category_src, raw_event, motor)
+            if not mapped_cat:
+                continue
+            title = extract_event_title(raw_event)
+            # Prefissi per basket in base alla lega se non già presente
+            if mapped_cat == 'basket':
+                if _RX_NBA.search(raw_event) and not _RX_NBA.match(title):
+                    title = f"NBA: {title}"
+                elif _RX_LBA.search(raw_event) and not _RX_LBA.match(title):
+                    title = f"LBA: {title}"
+                elif _RX_EUROLEAGUE.search(raw_event) and not _RX_EUROLEAGUE_PREFIX.match(title):
+                    title = f"Euroleague: {title}"
+                elif _RX_COPPA_ITALIA.search(raw_event) and not _RX_COPPA_ITALIA.match(title):
+                    title = f"Coppa Italia Basket: {title}"
+            streams_list = []
+            sappend = streams_list.append
+            for ch in channels:
+                url = get_stream_url(ch)
+                if not url:
+                    continue
+                ch_name = ''
+                if isinstance(ch, dict):
+                    ch_name = ch.get('channel_name') or f"CH-{ch.get('channel_id','')}"
+                if should_include_channel_text(f"{ch_name} {title} {effective_category_src}"):
+                    sappend({'url': url, 'title': ch_name})
+            if not streams_list:
+                continue
+            # Data/ora solo per gli eventi con almeno uno stream incluso
+            time_str = game.get('time', '00:00')
+            start_dt_utc = _combine(day_ymd, time_str)
+            event_start, rome_str = _format_start(start_dt_utc, day_rome_offset)
+            event_id = build_event_id(title, start_dt_utc)
+            # Stesso titolo allo stesso orario ripetuto nello schedule: unisce gli stream invece di duplicare l'evento
+            existing = seen.get((event_id, event_start))
+            if existing is not None:
+                merge_streams(existing, streams_list)
+                continue
+            # Logo solo per gli eventi che sopravvivono a tutti i filtri
+            logo = build_logo(effective_category_src, raw_event, motor)
+            entry = {
+                'id': event_id,
+                'name': title,
+                'streams': streams_list,
+                'logo': logo or None,
+                'category': mapped_cat,
+                'description': f"{effective_category_src} {rome_str}",
+                'eventStart': event_start
+            }
+            seen[(event_id, event_start)] = entry
+            append_entry(entry)
+    return entries, total_events, debug_categories
+
 def main():
     try:
         schedule = load_schedule()
@@ -306,104 +610,35 @@ def main():
 
     dynamic_channels: List[Dict[str, Any]] = []
     total_events = 0
-    included = 0
-
-    def clean_category_key(raw: str) -> str:
-        # Rimuove frammenti HTML come </span> e eventuali tag residui
-        c = raw.replace('</span>', '')
-        c = re.sub(r'<[^>]+>', '', c)
-        return c.strip()
-
-    debug_categories = {}
+    debug_categories: Dict[str, int] = Counter()
 
+    # Unico indice per tutto lo schedule: stesso evento sotto giorni diversi unisce gli stream
+    seen: Dict[tuple[str, str], Dict[str, Any]] = {}
     for day, day_data in schedule.items():
-        if not isinstance(day_data, dict):
-            continue
-        for category_src_raw, events in day_data.items():
-            category_src = clean_category_key(category_src_raw)
-            debug_categories[category_src] = debug_categories.get(category_src, 0) + (len(events) if isinstance(events, list) else 0)
-            if not isinstance(events, list):
-                continue
-            is_soccer_container = category_src.lower() in SOCCER_CONTAINER_NAMES
-            category_whitelisted = should_include_category(category_src)
-            for game in events:
-                total_events += 1
-                raw_event = (game.get('event') or '').strip()
-                if not raw_event:
-                    continue
-                effective_category_src = category_src
-                if is_soccer_container:
-                    detected = detect_inline_competition(raw_event)
-                    if not detected:
-                        continue  # evento soccer non whitelisted
-                    effective_category_src = detected
-                else:
-                    if not category_whitelisted:
-                        continue  # categoria non whitelisted
-                # Filtro specifico richiesto: nella categoria Tennis includi SOLO eventi con ATP o WTA nel nome
-                if effective_category_src == 'Tennis' and not re.search(r'\b(ATP|WTA)\b', raw_event, re.IGNORECASE):
-                    continue
-                mapped_cat = map_category(effective_category_src, raw_event)
-                if not mapped_cat:
-                    continue
-                time_str = game.get('time', '00:00')
-                start_dt_utc = parse_event_datetime(day, time_str)
-                if pytz and TZ_ROME:
-                    rome_dt = start_dt_utc.astimezone(TZ_ROME)
-                    # Mostra data + ora locale Roma
-                    rome_str = rome_dt.strftime('%d/%m %H:%M')
-                else:
-                    # Nessuna timezone: mostra solo data senza orario e senza etichetta UTC
-                    rome_str = start_dt_utc.strftime('%d/%m')
-                title = extract_event_title(raw_event)
-                # Prefissi per basket in base alla lega se non già presente
-                if mapped_cat == 'basket':
-                    if re.search(r'\bNBA\b', raw_event, re.IGNORECASE) and not re.match(r'^NBA\b', title, re.IGNORECASE):
-                        title = f"NBA: {title}"
-                    elif re.search(r'\bLBA\b', raw_event, re.IGNORECASE) and not re.match(r'^LBA\b', title, re.IGNORECASE):
-                        title = f"LBA: {title}"
-                    elif re.search(r'Euroleague|Eurolega', raw_event, re.IGNORECASE) and not re.match(r'^(Euroleague|Eurolega)\b', title, re.IGNORECASE):
-                        title = f"Euroleague: {title}"
-                    elif re.search(r'Coppa Italia', raw_event, re.IGNORECASE) and not re.match(r'^Coppa Italia', title, re.IGNORECASE):
-                        title = f"Coppa Italia Basket: {title}"
-                logo = build_logo(effective_category_src, raw_event)
-                streams_list = []
-                for ch in game.get('channels', []):
-                    url = get_stream_url(ch)
-                    if not url:
-                        continue
-                    ch_name = ''
-                    if isinstance(ch, dict):
-                        ch_name = ch.get('channel_name') or f"CH-{ch.get('channel_id','')}"
-                    if should_include_channel_text(f"{ch_name} {title} {effective_category_src}"):
-                        streams_list.append({'url': url, 'title': ch_name})
-                if not streams_list:
-                    continue
-                event_id = build_event_id(title, start_dt_utc)
-                entry = {
-                    'id': event_id,
-                    'name': title,
-                    'streams': streams_list,
-                    'logo': logo or None,
-                    'category': mapped_cat,
-                    'description': f"{effective_category_src} {rome_str}",
-                    'eventStart': start_dt_utc.replace(microsecond=0).isoformat().replace('+00:00','Z')
-                }
-                dynamic_channels.append(entry)
-                included += 1
+        day_entries, day_total, day_categories = process_day(day, day_data, seen)
+        dynamic_channels.extend(day_entries)
+        total_events += day_total
+        debug_categories.update(day_categories)
+    included = len(dynamic_channels)
 
     # Ordina per orario di inizio e secondariamente per nome (stabile)
     dynamic_channels.sort(key=lambda e: (e['eventStart'], e['name'].lower()))
 
+    if VALIDATE_LOGOS:
+        cleared = validate_logos(dynamic_channels)
+        if cleared:
+            print(f"Loghi non trovati (404) rimossi da {cleared} eventi")
+
     os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
     try:
-        with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-            json.dump(dynamic_channels, f, ensure_ascii=False, indent=2)
+        with open(OUTPUT_FILE, 'wb') as f:
+            write_json_array(f, dynamic_channels)
         print(f"Creati {included} eventi dinamici (su {total_events} analizzati) -> {OUTPUT_FILE}")
-        # Stampa riepilogo categorie viste (debug)
-        print("Categorie viste (dopo cleaning):")
-        for k,v in sorted(debug_categories.items()):
-            print(f" - {k}: {v} eventi grezzi")
+        if _DEBUG:
+            # Stampa riepilogo categorie viste (debug)
+            print("Categorie viste (dopo cleaning):")
+            for k,v in sorted(debug_categories.items()):
+                print(f" - {k}: {v} eventi grezzi")
     except Exception as e:
         print(f"Errore scrittura output: {e}")
 